@@ -1,113 +1,361 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+import matplotlib
 from datetime import datetime
+from functools import cache, cached_property, wraps
 import numpy as np
 
 # 设置中文字体支持
-plt.rcParams['font.sans-serif'] = ['Arial Unicode MS', 'SimHei', 'DejaVu Sans']
-plt.rcParams['axes.unicode_minus'] = False
+matplotlib.rcParams['font.sans-serif'] = ['Arial Unicode MS', 'SimHei', 'DejaVu Sans']
+matplotlib.rcParams['axes.unicode_minus'] = False
+
+
+@cache
+def _pyplot():
+    """按需导入 pyplot：只做数据统计时无需加载绘图后端"""
+    import matplotlib.pyplot as plt
+    return plt
+
+
+# PDF各页的布局：标题(文字, 字号, 纵向位置)、子图间距、子图网格位置
+_PAGE_LAYOUTS = {
+    'overview': (('个人财务分析报告', 18, 0.98),
+                 dict(hspace=0.4, wspace=0.3, top=0.95, bottom=0.05),
+                 [(3, 2, i) for i in range(1, 7)]),
+    'categories': (('分类分析与支付方式', 16, 0.95),
+                   dict(hspace=0.4, wspace=0.3, top=0.9, bottom=0.1),
+                   [(2, 2, 1), (2, 2, 2), (2, 1, 2)]),
+    'details': (('详细交易记录', 16, 0.95), {}, []),
+}
+
+
+def _page_figure(page_size, layout):
+    """创建已设置好标题、子图间距和空子图的页面图形"""
+    (title, fontsize, y), spacing, grid = _PAGE_LAYOUTS[layout]
+    fig = _pyplot().figure(figsize=page_size)
+    fig.suptitle(title, fontsize=fontsize, fontweight='bold', y=y)
+    if spacing:
+        fig.subplots_adjust(**spacing)
+    for position in grid:
+        fig.add_subplot(*position)
+    return fig
+
+
+def _tracks_axes(plot):
+    """登记子图所在的轴，refresh 时据此就地更新或重绘"""
+    name = plot.__name__[len('_plot_'):]
+    
+    @wraps(plot)
+    def wrapper(self, ax):
+        self._artists[ax] = {'name': name}
+        return plot(self, ax)
+    return wrapper
+
 
 class ChartVisualizer:
+    # 按需计算并缓存的派生数据，数据变更时统一失效
+    _CACHED_ATTRIBUTES = (
+        '_income_mask', '_expense_mask', 'income_data', 'expense_data',
+        '_flow_key', '_has_income', '_has_expense', '_total_income', '_total_expense',
+        '_expense_by_category', '_income_by_category',
+        'weekly_expense_stats', 'hourly_expense_stats', 'monthly_stats',
+        '_income_amounts', '_expense_amounts', '_summary_cache',
+        '_expense_category', '_income_category'
+    )
+    
     def __init__(self, data):
         """
         初始化图表可视化器
         :param data: 处理后的交易数据DataFrame
         """
+        # 已绘制子图的轴及其可复用的图形元素，供 refresh 就地更新
+        self._artists = {}
         self.data = data
+    
+    @property
+    def data(self):
+        return self._data
+    
+    @data.setter
+    def data(self, data):
+        """替换数据时重新预处理，并使所有缓存的派生数据失效"""
+        # 浅拷贝后再规范列名、转换类型，不修改调用方传入的DataFrame（列数据本身不复制）
+        self._data = data.copy(deep=False) if data is not None else None
         self.prepare_data()
     
+    def _invalidate_cache(self):
+        """清除所有已缓存的派生数据，下次访问时重新计算"""
+        for name in self._CACHED_ATTRIBUTES:
+            self.__dict__.pop(name, None)
+    
     def prepare_data(self):
-        """准备和预处理数据"""
+        """准备和预处理数据（派生统计在首次访问时才计算）"""
+        self._invalidate_cache()
+        
         if self.data is None or self.data.empty:
             print("错误：没有可用的数据进行可视化")
             return
         
+        # 统一分类列名：微信账单为"交易类型"，支付宝为"交易分类"。两列并存时交易类型优先，
+        # 合并后只保留交易分类，后续分组与图表只需认一个列名
+        if '交易类型' in self.data.columns:
+            if '交易分类' in self.data.columns:
+                self.data['交易分类'] = self.data['交易类型'].astype(object).combine_first(self.data['交易分类'].astype(object))
+            else:
+                self.data['交易分类'] = self.data['交易类型']
+            del self.data['交易类型']
+        
         # 确保数据类型正确
         if '交易时间' in self.data.columns:
             self.data['交易时间'] = pd.to_datetime(self.data['交易时间'])
-            self.data['年月'] = self.data['交易时间'].dt.to_period('M')
-        
-        # 分离收入和支出
+            
+            # 预先计算各时间维度，供月度、周度、星期、小时分析直接取用
+            dt = self.data['交易时间'].dt
+            self.data['年月'] = dt.to_period('M')
+            self.data['年周'] = dt.to_period('W')
+            # 无缺失时间时下转为int8，存在NaT时保持浮点以保留缺失值
+            self.data['星期'] = pd.to_numeric(dt.dayofweek, downcast='integer')
+            self.data['小时'] = pd.to_numeric(dt.hour, downcast='integer')
+        
+        # 金额保持float64：float32在十几万元量级已无法精确表示到分，汇总表会出现一分钱误差
+        if '金额' in self.data.columns:
+            self.data['金额'] = pd.to_numeric(self.data['金额'])
+            # 金额绝对值供排序和显示直接取用
+            self.data['金额绝对值'] = np.abs(self.data['金额'].to_numpy())
+        
+        # 分类型文本列取值重复度高，转为分类类型以缩小内存并让分组按整数编码进行；
+        # 收/支只有少数几种取值，转换后只需在类别上做字符串匹配，逐行判断退化为整数编码比较
+        for column in ['交易分类', '交易对方', '商品说明', '收/支']:
+            if column in self.data.columns:
+                self.data[column] = self.data[column].astype('category')
+    
+    def _flow_mask(self, keyword):
+        """按收/支类别生成布尔掩码"""
+        categories = self.data['收/支'].cat.categories.astype(str)
+        codes = self.data['收/支'].cat.codes.to_numpy()
+        return np.isin(codes, np.flatnonzero(categories.str.contains(keyword)))
+    
+    @cached_property
+    def _income_mask(self):
         if '收/支' in self.data.columns:
-            self.income_data = self.data[self.data['收/支'].str.contains('收入', na=False)]
-            self.expense_data = self.data[self.data['收/支'].str.contains('支出', na=False)]
-        else:
-            # 如果没有收/支列，根据金额正负判断
-            self.income_data = self.data[self.data['金额'] > 0]
-            self.expense_data = self.data[self.data['金额'] < 0]
+            return self._flow_mask('收入')
+        # 如果没有收/支列，根据金额正负判断
+        return self.data['金额'].to_numpy() > 0
+    
+    @cached_property
+    def _expense_mask(self):
+        if '收/支' in self.data.columns:
+            return self._flow_mask('支出')
+        # 如果没有收/支列，根据金额正负判断
+        return self.data['金额'].to_numpy() < 0
+    
+    @cached_property
+    def _flow_key(self):
+        """由收支掩码得到统一的收/支分组键，兼容没有收/支列、按金额正负判断的数据"""
+        flow_codes = np.where(self._income_mask, 0, np.where(self._expense_mask, 1, 2))
+        return pd.Categorical.from_codes(flow_codes, categories=['收入', '支出', '其他'])
+    
+    @cached_property
+    def income_data(self):
+        return self.data[self._income_mask]
     
+    @cached_property
+    def expense_data(self):
+        return self.data[self._expense_mask]
+    
+    @cached_property
+    def _has_income(self):
+        return bool(self._income_mask.any())
+    
+    @cached_property
+    def _has_expense(self):
+        return bool(self._expense_mask.any())
+    
+    @cached_property
+    def _income_amounts(self):
+        """收入金额的ndarray，供统计直接做numpy归约"""
+        return self.income_data['金额'].to_numpy()
+    
+    @cached_property
+    def _expense_amounts(self):
+        """支出金额的ndarray"""
+        return self.expense_data['金额'].to_numpy()
+    
+    @cached_property
+    def _total_income(self):
+        return np.nansum(self._income_amounts)
+    
+    @cached_property
+    def _total_expense(self):
+        return abs(np.nansum(self._expense_amounts))
+    
+    @cached_property
+    def _expense_category(self):
+        """支出记录的统一分类（交易分类为空时退回商品说明）"""
+        return self._unify_category(self.expense_data, ['交易分类', '商品说明'], '其他')
+    
+    @cached_property
+    def _income_category(self):
+        """收入记录的统一分类"""
+        return self._unify_category(self.income_data, ['交易分类'], '其他')
+    
+    @cached_property
+    def _expense_by_category(self):
+        """按统一分类汇总支出金额与笔数，各分类图表和汇总表共用（均值由 sum/count 推导）"""
+        return self.expense_data['金额'].groupby(self._expense_category, observed=True, sort=False).agg(['sum', 'count'])
+    
+    @cached_property
+    def _income_by_category(self):
+        """按统一分类汇总收入金额与笔数"""
+        return self.income_data['金额'].groupby(self._income_category, observed=True, sort=False).agg(['sum', 'count'])
+    
+    @cached_property
+    def weekly_expense_stats(self):
+        """按星期汇总支出金额与笔数"""
+        expense_data = self.expense_data
+        weekly_stats = expense_data['金额'].groupby(expense_data['星期'], sort=False).agg(['sum', 'count']).round(2)
+        weekly_stats.columns = ['总金额', '交易次数']
+        weekly_stats['总金额'] = weekly_stats['总金额'].abs()
+        return weekly_stats
+    
+    @cached_property
+    def hourly_expense_stats(self):
+        """按小时汇总支出金额与笔数"""
+        expense_data = self.expense_data
+        hourly_stats = expense_data['金额'].groupby(expense_data['小时']).agg(['sum', 'count']).round(2)
+        hourly_stats.columns = ['总金额', '交易次数']
+        hourly_stats['总金额'] = hourly_stats['总金额'].abs()
+        return hourly_stats
+    
+    @cached_property
+    def monthly_stats(self):
+        """按月汇总交易笔数、收入、支出和净收入（单次 pivot_table 聚合）"""
+        pivot = pd.DataFrame({
+            '年月': self.data['年月'].to_numpy(),
+            '收/支': self._flow_key,
+            '金额': self.data['金额'].to_numpy()
+        }).pivot_table(index='年月', columns='收/支', values='金额',
+                       aggfunc=['sum', 'count'], observed=False, fill_value=0)
+        
+        income = pivot[('sum', '收入')]
+        expense = pivot[('sum', '支出')].abs()
+        return pd.DataFrame({
+            '交易笔数': pivot['count'].sum(axis=1),
+            '总收入': income,
+            '总支出': expense,
+            '净收入': income - expense
+        })
+    
+    def _unify_category(self, data, columns, default):
+        """
+        按优先级合并多个分类列，逐列取第一个非空值（整列向量化操作）
+        :param data: 交易数据DataFrame
+        :param columns: 按优先级排列的候选列名
+        :param default: 所有候选列均为空时的默认值
+        """
+        unified = pd.Series(index=data.index, dtype=object)
+        for column in columns:
+            if column in data.columns:
+                # 分类列先转为object，避免不同类别集合合并时出错
+                unified = unified.combine_first(data[column].astype(object))
+        return unified.fillna(default)
+    
+    def _draw_empty(self, ax, message, title=None, fontsize=12):
+        """在子图中央绘制无数据提示"""
+        ax.text(0.5, 0.5, message, ha='center', va='center', transform=ax.transAxes, fontsize=fontsize)
+        if title:
+            ax.set_title(title)
+    
+    @staticmethod
+    def _annotate_pie_percentages(ax, wedges, sizes, fontsize):
+        """在各扇形中心标注百分比（代替 autopct 的逐扇形回调）"""
+        sizes = np.asarray(sizes, dtype=float)
+        pct = sizes / sizes.sum() * 100
+        theta = np.deg2rad([(wedge.theta1 + wedge.theta2) / 2 for wedge in wedges])
+        # 与 autopct 默认位置一致：半径的 0.6 倍处
+        for wedge, angle, value in zip(wedges, theta, pct):
+            x, y = wedge.center
+            ax.text(x + 0.6 * wedge.r * np.cos(angle), y + 0.6 * wedge.r * np.sin(angle),
+                    f'{value:.1f}%', ha='center', va='center',
+                    color='white', fontweight='bold', fontsize=fontsize)
+    
+    @_tracks_axes
     def _plot_income_expense_comparison(self, ax):
         """绘制整体收入支出对比图"""
         # 统计整体收入和支出（融合微信和支付宝数据）
-        income_data = self.data[self.data['收/支'].str.contains('收入', na=False)]
-        expense_data = self.data[self.data['收/支'].str.contains('支出', na=False)]
+        if self._total_income > 0 or self._total_expense > 0:
+            self._build_income_expense_comparison(ax)
+            self._update_income_expense_comparison(ax, self._artists[ax])
+        else:
+            self._draw_empty(ax, '暂无数据')
+    
+    def _build_income_expense_comparison(self, ax):
+        """创建收支对比图的柱形与文本，数值由 _update_income_expense_comparison 填充"""
+        categories = ['总收入', '总支出']
+        colors = ['#2E8B57', '#DC143C']  # 深绿色和深红色
+        
+        bars = ax.bar(categories, [0, 0], color=colors, alpha=0.8)
+        ax.set_title('整体收支对比', fontsize=14, fontweight='bold')
+        ax.set_ylabel('金额 (元)')
+        
+        # 净收入信息
+        net_text = ax.text(0.5, 0.95, '', 
+                          transform=ax.transAxes, ha='center', va='top',
+                          fontsize=12, fontweight='bold',
+                          bbox=dict(boxstyle="round,pad=0.3", facecolor='lightgray', alpha=0.7))
+        
+        self._artists[ax].update(bars=bars, labels=[], net_text=net_text)
+    
+    def _update_income_expense_comparison(self, ax, artists):
+        """用当前数据更新收支对比图，无法就地更新时返回False"""
+        total_income = self._total_income
+        total_expense = self._total_expense
+        if 'bars' not in artists or not (total_income > 0 or total_expense > 0):
+            return False
+        
+        amounts = [total_income, total_expense]
+        for bar, amount in zip(artists['bars'], amounts):
+            bar.set_height(amount)
+        
+        # 数值标签
+        for label in artists['labels']:
+            label.remove()
+        artists['labels'] = ax.bar_label(artists['bars'], labels=[f'¥{amount:.2f}' for amount in amounts],
+                                         padding=3, fontsize=11, fontweight='bold')
         
-        total_income = income_data['金额'].sum()
-        total_expense = abs(expense_data['金额'].sum())
+        net_income = total_income - total_expense
+        artists['net_text'].set_text(f'净收入: ¥{net_income:.2f}')
+        artists['net_text'].set_color('#2E8B57' if net_income >= 0 else '#DC143C')
         
-        if total_income > 0 or total_expense > 0:
-            categories = ['总收入', '总支出']
-            amounts = [total_income, total_expense]
-            colors = ['#2E8B57', '#DC143C']  # 深绿色和深红色
-            
-            bars = ax.bar(categories, amounts, color=colors, alpha=0.8)
-            ax.set_title('整体收支对比', fontsize=14, fontweight='bold')
-            ax.set_ylabel('金额 (元)')
-            
-            # 添加数值标签
-            for bar, amount in zip(bars, amounts):
-                height = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width()/2., height + height*0.01,
-                       f'¥{amount:.2f}', ha='center', va='bottom', fontsize=11, fontweight='bold')
-            
-            # 添加净收入信息
-            net_income = total_income - total_expense
-            net_color = '#2E8B57' if net_income >= 0 else '#DC143C'
-            ax.text(0.5, 0.95, f'净收入: ¥{net_income:.2f}', 
-                   transform=ax.transAxes, ha='center', va='top',
-                   fontsize=12, fontweight='bold', color=net_color,
-                   bbox=dict(boxstyle="round,pad=0.3", facecolor='lightgray', alpha=0.7))
-        else:
-            ax.text(0.5, 0.5, '暂无数据', ha='center', va='center', transform=ax.transAxes, fontsize=12)
+        ax.relim()
+        ax.autoscale_view()
+        return True
     
+    @_tracks_axes
     def _plot_weekly_trend_subplot(self, ax):
         """在指定轴上绘制周度趋势图"""
         if '交易时间' not in self.data.columns:
-            ax.text(0.5, 0.5, '缺少时间数据', ha='center', va='center', transform=ax.transAxes)
-            ax.set_title('周度收入支出趋势')
-            return
-        
-        # 创建周度数据
-        data_with_week = self.data.copy()
-        data_with_week['年周'] = data_with_week['交易时间'].dt.to_period('W')
+            return self._draw_empty(ax, '缺少时间数据', '周度收入支出趋势', fontsize=None)
         
-        # 按周统计收入支出
-        income_data_week = data_with_week[data_with_week['收/支'].str.contains('收入', na=False)]
-        expense_data_week = data_with_week[data_with_week['收/支'].str.contains('支出', na=False)]
+        # 按周统计收入支出：以(年周, 收/支)为键一次分组，再展开为收入、支出两列
+        flow_mask = self._income_mask | self._expense_mask
+        weekly = self.data['金额'][flow_mask].groupby(
+            [self.data['年周'][flow_mask], self._flow_key[flow_mask]], observed=True, sort=False
+        ).sum().unstack(fill_value=0)
         
-        weekly_income = income_data_week.groupby('年周')['金额'].sum() if not income_data_week.empty else pd.Series()
-        weekly_expense = expense_data_week.groupby('年周')['金额'].sum().apply(abs) if not expense_data_week.empty else pd.Series()
-        
-        # 创建完整的周索引
-        if not weekly_income.empty or not weekly_expense.empty:
-            start_week = min(weekly_income.index.min() if not weekly_income.empty else weekly_expense.index.min(),
-                           weekly_expense.index.min() if not weekly_expense.empty else weekly_income.index.min())
-            end_week = max(weekly_income.index.max() if not weekly_income.empty else weekly_expense.index.max(),
-                         weekly_expense.index.max() if not weekly_expense.empty else weekly_income.index.max())
-            
-            all_weeks = pd.period_range(start=start_week, end=end_week, freq='W')
-            
-            weekly_income = weekly_income.reindex(all_weeks, fill_value=0)
-            weekly_expense = weekly_expense.reindex(all_weeks, fill_value=0)
+        # 创建完整的周索引，缺失的周次或收支类型补0
+        if weekly.empty:
+            all_weeks = pd.PeriodIndex([], freq='W')
+        else:
+            all_weeks = pd.period_range(start=weekly.index.min(), end=weekly.index.max(), freq='W')
+        weekly = weekly.reindex(index=all_weeks, columns=['收入', '支出'], fill_value=0)
         
-        if not weekly_income.empty:
-            ax.plot(range(len(weekly_income)), weekly_income.values, 
-                    marker='o', linewidth=2, label='收入', color='green')
+        weekly_income = weekly['收入']
+        weekly_expense = weekly['支出'].abs()
         
-        if not weekly_expense.empty:
-            ax.plot(range(len(weekly_expense)), weekly_expense.values, 
-                    marker='s', linewidth=2, label='支出', color='red')
+        ax.plot(range(len(weekly_income)), weekly_income.values, 
+                marker='o', linewidth=2, label='收入', color='green')
+        ax.plot(range(len(weekly_expense)), weekly_expense.values, 
+                marker='s', linewidth=2, label='支出', color='red')
         
         ax.set_title('周度收入支出趋势')
         ax.set_xlabel('周次')
@@ -115,22 +363,19 @@ class ChartVisualizer:
         ax.legend()
         
         # 设置x轴标签（显示部分周次以避免拥挤）
-        if not weekly_income.empty or not weekly_expense.empty:
-            week_labels = [f"第{i+1}周" for i in range(len(all_weeks))]
-            step = max(1, len(week_labels) // 10)  # 最多显示10个标签
-            ax.set_xticks(range(0, len(week_labels), step))
-            ax.set_xticklabels([week_labels[i] for i in range(0, len(week_labels), step)], rotation=45)
+        week_labels = [f"第{i+1}周" for i in range(len(all_weeks))]
+        step = max(1, len(week_labels) // 10)  # 最多显示10个标签
+        ax.set_xticks(range(0, len(week_labels), step))
+        ax.set_xticklabels([week_labels[i] for i in range(0, len(week_labels), step)], rotation=45)
         
         ax.grid(True, alpha=0.3)
     
+    @_tracks_axes
     def _plot_income_expense_pie(self, ax):
         """绘制整体收支比例饼图"""
         # 统计整体收入和支出（融合微信和支付宝数据）
-        income_data = self.data[self.data['收/支'].str.contains('收入', na=False)]
-        expense_data = self.data[self.data['收/支'].str.contains('支出', na=False)]
-        
-        total_income = income_data['金额'].sum()
-        total_expense = abs(expense_data['金额'].sum())
+        total_income = self._total_income
+        total_expense = self._total_expense
         
         if total_income > 0 or total_expense > 0:
             labels = ['收入', '支出']
@@ -139,15 +384,9 @@ class ChartVisualizer:
             explode = (0.05, 0.05)  # 稍微分离饼图片段
             
             # 绘制饼图
-            wedges, texts, autotexts = ax.pie(sizes, labels=labels, colors=colors, 
-                                            autopct='%1.1f%%', startangle=90, 
-                                            explode=explode, shadow=True)
-            
-            # 美化文本
-            for autotext in autotexts:
-                autotext.set_color('white')
-                autotext.set_fontweight('bold')
-                autotext.set_fontsize(11)
+            wedges, texts = ax.pie(sizes, labels=labels, colors=colors, 
+                                   startangle=90, explode=explode)
+            self._annotate_pie_percentages(ax, wedges, sizes, fontsize=11)
             
             for text in texts:
                 text.set_fontsize(12)
@@ -160,140 +399,99 @@ class ChartVisualizer:
             ax.legend(wedges, legend_labels, title="详细金额", loc="center left", 
                      bbox_to_anchor=(1, 0, 0.5, 1), fontsize=10)
         else:
-            ax.text(0.5, 0.5, '暂无数据', ha='center', va='center', transform=ax.transAxes, fontsize=12)
+            self._draw_empty(ax, '暂无数据')
 
+    @_tracks_axes
     def _plot_expense_category_pie(self, ax):
         """绘制支出品类分布饼图"""
-        expense_data = self.data[self.data['收/支'].str.contains('支出', na=False)]
-        
-        if not expense_data.empty:
-            # 按交易类型分组统计支出，优先使用'交易分类'列，如果不存在则使用'交易类型'列
-            category_column = '交易分类' if '交易分类' in self.data.columns else '交易类型'
-            category_stats = expense_data.groupby(category_column)['金额'].sum().abs().sort_values(ascending=False)
-            
-            if len(category_stats) > 0:
-                # 取前8个最大的类别，其余归为"其他"
-                if len(category_stats) > 8:
-                    top_categories = category_stats.head(8)
-                    others_sum = category_stats.tail(len(category_stats) - 8).sum()
-                    if others_sum > 0:
-                        top_categories['其他'] = others_sum
-                    category_stats = top_categories
-                
-                # 生成颜色
-                colors = plt.cm.Set3(np.linspace(0, 1, len(category_stats)))
-                
-                # 绘制饼图
-                wedges, texts, autotexts = ax.pie(category_stats.values, 
-                                                labels=category_stats.index, 
-                                                colors=colors,
-                                                autopct='%1.1f%%', 
-                                                startangle=90,
-                                                shadow=True)
-                
-                # 美化文本
-                for autotext in autotexts:
-                    autotext.set_color('white')
-                    autotext.set_fontweight('bold')
-                    autotext.set_fontsize(9)
-                
-                for text in texts:
-                    text.set_fontsize(10)
-                
-                ax.set_title('支出品类分布', fontsize=14, fontweight='bold', pad=20)
-                
-                # 添加图例，显示具体金额
-                legend_labels = [f'{cat}: ¥{amount:.2f}' for cat, amount in category_stats.items()]
-                ax.legend(wedges, legend_labels, title="详细金额", loc="center left", 
-                         bbox_to_anchor=(1, 0, 0.5, 1), fontsize=8)
-            else:
-                ax.text(0.5, 0.5, '暂无支出数据', ha='center', va='center', 
-                       transform=ax.transAxes, fontsize=12)
-        else:
-            ax.text(0.5, 0.5, '暂无支出数据', ha='center', va='center', 
-                   transform=ax.transAxes, fontsize=12)
+        if not self._has_expense:
+            return self._draw_empty(ax, '暂无支出数据')
+        
+        # 使用预先汇总的分类统计
+        category_stats = self._expense_by_category['sum'].abs()
+        
+        # 取前8个最大的类别（nlargest 无需对全部类别排序），其余归为"其他"
+        top_categories = category_stats.nlargest(8)
+        if len(category_stats) > 8:
+            others_sum = category_stats.sum() - top_categories.sum()
+            if others_sum > 0:
+                top_categories['其他'] = others_sum
+        category_stats = top_categories
+        
+        # 生成颜色
+        colors = matplotlib.colormaps['Set3'](np.linspace(0, 1, len(category_stats)))
+        
+        # 绘制饼图
+        wedges, texts = ax.pie(category_stats.values, 
+                               labels=category_stats.index, 
+                               colors=colors,
+                               startangle=90)
+        self._annotate_pie_percentages(ax, wedges, category_stats.values, fontsize=9)
+        
+        for text in texts:
+            text.set_fontsize(10)
+        
+        ax.set_title('支出品类分布', fontsize=14, fontweight='bold', pad=20)
+        
+        # 添加图例，显示具体金额
+        legend_labels = category_stats.index.astype(str) + ': ¥' + category_stats.map('{:.2f}'.format)
+        ax.legend(wedges, legend_labels, title="详细金额", loc="center left", 
+                 bbox_to_anchor=(1, 0, 0.5, 1), fontsize=8)
 
+    @_tracks_axes
     def _plot_income_source_pie(self, ax):
         """绘制收入来源分布饼图"""
-        income_data = self.data[self.data['收/支'].str.contains('收入', na=False)]
-        
-        if not income_data.empty:
-            # 按交易类型分组统计收入，优先使用'交易分类'列，如果不存在则使用'交易类型'列
-            category_column = '交易分类' if '交易分类' in self.data.columns else '交易类型'
-            source_stats = income_data.groupby(category_column)['金额'].sum().sort_values(ascending=False)
-            
-            if len(source_stats) > 0:
-                # 取前8个最大的来源，其余归为"其他"
-                if len(source_stats) > 8:
-                    top_sources = source_stats.head(8)
-                    others_sum = source_stats.tail(len(source_stats) - 8).sum()
-                    if others_sum > 0:
-                        top_sources['其他'] = others_sum
-                    source_stats = top_sources
-                
-                # 生成颜色
-                colors = plt.cm.Set2(np.linspace(0, 1, len(source_stats)))
-                
-                # 绘制饼图
-                wedges, texts, autotexts = ax.pie(source_stats.values, 
-                                                labels=source_stats.index, 
-                                                colors=colors,
-                                                autopct='%1.1f%%', 
-                                                startangle=90,
-                                                shadow=True)
-                
-                # 美化文本
-                for autotext in autotexts:
-                    autotext.set_color('white')
-                    autotext.set_fontweight('bold')
-                    autotext.set_fontsize(9)
-                
-                for text in texts:
-                    text.set_fontsize(10)
-                
-                ax.set_title('收入来源分布', fontsize=14, fontweight='bold', pad=20)
-                
-                # 添加图例，显示具体金额
-                legend_labels = [f'{source}: ¥{amount:.2f}' for source, amount in source_stats.items()]
-                ax.legend(wedges, legend_labels, title="详细金额", loc="center left", 
-                         bbox_to_anchor=(1, 0, 0.5, 1), fontsize=8)
-            else:
-                ax.text(0.5, 0.5, '暂无收入数据', ha='center', va='center', 
-                       transform=ax.transAxes, fontsize=12)
-        else:
-            ax.text(0.5, 0.5, '暂无收入数据', ha='center', va='center', 
-                   transform=ax.transAxes, fontsize=12)
+        if not self._has_income:
+            return self._draw_empty(ax, '暂无收入数据')
+        
+        # 使用预先汇总的分类统计
+        source_stats = self._income_by_category['sum']
+        
+        # 取前8个最大的来源（nlargest 无需对全部来源排序），其余归为"其他"
+        top_sources = source_stats.nlargest(8)
+        if len(source_stats) > 8:
+            others_sum = source_stats.sum() - top_sources.sum()
+            if others_sum > 0:
+                top_sources['其他'] = others_sum
+        source_stats = top_sources
+        
+        # 生成颜色
+        colors = matplotlib.colormaps['Set2'](np.linspace(0, 1, len(source_stats)))
+        
+        # 绘制饼图
+        wedges, texts = ax.pie(source_stats.values, 
+                               labels=source_stats.index, 
+                               colors=colors,
+                               startangle=90)
+        self._annotate_pie_percentages(ax, wedges, source_stats.values, fontsize=9)
+        
+        for text in texts:
+            text.set_fontsize(10)
+        
+        ax.set_title('收入来源分布', fontsize=14, fontweight='bold', pad=20)
+        
+        # 添加图例，显示具体金额
+        legend_labels = source_stats.index.astype(str) + ': ¥' + source_stats.map('{:.2f}'.format)
+        ax.legend(wedges, legend_labels, title="详细金额", loc="center left", 
+                 bbox_to_anchor=(1, 0, 0.5, 1), fontsize=8)
     
+    @_tracks_axes
     def _plot_payment_method_subplot(self, ax):
         """绘制消费分类分析（使用真正的商品类别）"""
-        # 统计所有支出交易的商品分类
-        expense_data = self.data[self.data['收/支'].str.contains('支出', na=False)].copy()
-        
-        if expense_data.empty:
-            ax.text(0.5, 0.5, '暂无支出数据', ha='center', va='center', transform=ax.transAxes, fontsize=12)
-            ax.set_title('消费分类分析')
-            return
-        
-        # 统一分类字段：微信使用"交易类型"，支付宝使用"交易分类"
-        expense_data['统一分类'] = expense_data.apply(lambda row: 
-            row.get('交易类型', row.get('交易分类', row.get('商品说明', '其他'))), axis=1)
+        if not self._has_expense:
+            return self._draw_empty(ax, '暂无支出数据', '消费分类分析')
         
-        # 按分类统计支出金额（使用统一分类字段）
-        category_stats = expense_data.groupby('统一分类').agg({
-            '金额': ['sum', 'count']
-        }).round(2)
+        # 按分类统计支出金额（使用预先汇总的统一分类统计）
+        category_stats = self._expense_by_category.round(2)
         
         category_stats.columns = ['总金额', '交易次数']
         category_stats['总金额'] = category_stats['总金额'].abs()  # 取绝对值
-        category_stats = category_stats.sort_values('总金额', ascending=True)
         
-        # 取前8个分类
-        top_categories = category_stats.tail(8)
+        # 取前8个分类（按金额升序排列，使最大的分类位于条形图顶部）
+        top_categories = category_stats.nlargest(8, '总金额').iloc[::-1]
         
         if top_categories.empty:
-            ax.text(0.5, 0.5, '暂无分类数据', ha='center', va='center', transform=ax.transAxes, fontsize=12)
-            ax.set_title('消费分类分析')
-            return
+            return self._draw_empty(ax, '暂无分类数据', '消费分类分析')
         
         # 绘制水平条形图
         categories = top_categories.index
@@ -301,60 +499,47 @@ class ChartVisualizer:
         counts = top_categories['交易次数']
         
         # 使用渐变色彩
-        colors = plt.cm.Set3(np.linspace(0, 1, len(categories)))
+        colors = matplotlib.colormaps['Set3'](np.linspace(0, 1, len(categories)))
         
         bars = ax.barh(categories, amounts, color=colors, alpha=0.8)
         ax.set_title('消费分类分析 (TOP8)', fontsize=14, fontweight='bold')
         ax.set_xlabel('消费金额 (元)')
         
         # 添加数值标签
-        for i, (category, amount, count) in enumerate(zip(categories, amounts, counts)):
-            ax.text(amount + max(amounts) * 0.01, i, 
-                   f'¥{amount:.0f} ({count}笔)', 
-                   va='center', fontsize=9)
+        labels = [f'¥{amount:.0f} ({count}笔)' for amount, count in zip(amounts, counts)]
+        ax.bar_label(bars, labels=labels, padding=3, fontsize=9)
         
         ax.grid(axis='x', alpha=0.3)
         
         # 调整布局
-        plt.setp(ax.get_yticklabels(), fontsize=10)
+        ax.tick_params(axis='y', labelsize=10)
     
+    @_tracks_axes
     def _plot_income_source_analysis(self, ax):
         """绘制收入来源详细分析表格"""
-        # 只分析收入数据
-        income_data = self.data[self.data['收/支'].str.contains('收入', na=False)].copy()
-        
-        if income_data.empty:
-            ax.text(0.5, 0.5, '暂无收入数据', ha='center', va='center', transform=ax.transAxes)
-            ax.set_title('收入来源分析')
+        if not self._has_income:
+            self._draw_empty(ax, '暂无收入数据', '收入来源分析', fontsize=None)
             ax.axis('off')
             return
         
-        # 统一分类字段：微信使用"交易类型"，支付宝使用"交易分类"
-        income_data['收入类型'] = income_data.apply(lambda row: 
-            row.get('交易类型', row.get('交易分类', '其他')), axis=1)
-        
-        # 按收入类型统计
-        income_stats = income_data.groupby('收入类型').agg({
-            '金额': ['sum', 'count', 'mean']
-        }).round(2)
-        
-        income_stats.columns = ['总金额', '交易次数', '平均金额']
+        # 按收入类型统计（使用预先汇总的统计，平均金额由总金额/笔数推导）
+        income_stats = self._income_by_category.rename(columns={'sum': '总金额', 'count': '交易次数'})
+        income_stats['平均金额'] = income_stats['总金额'] / income_stats['交易次数']
+        income_stats = income_stats.round(2)
         income_stats = income_stats.sort_values('总金额', ascending=False)
         
         # 计算占比
         total_income = income_stats['总金额'].sum()
         income_stats['占比'] = (income_stats['总金额'] / total_income * 100).round(1)
         
-        # 创建表格数据
-        table_data = []
-        for idx, (category, row) in enumerate(income_stats.iterrows()):
-            table_data.append([
-                category,
-                f'¥{row["总金额"]:.2f}',
-                f'{row["交易次数"]:.0f}笔',
-                f'¥{row["平均金额"]:.2f}',
-                f'{row["占比"]:.1f}%'
-            ])
+        # 创建表格数据（逐列格式化后拼接成行）
+        table_data = np.column_stack([
+            income_stats.index.astype(str),
+            '¥' + income_stats['总金额'].map('{:.2f}'.format),
+            income_stats['交易次数'].map('{:.0f}笔'.format),
+            '¥' + income_stats['平均金额'].map('{:.2f}'.format),
+            income_stats['占比'].map('{:.1f}%'.format)
+        ]).tolist()
         
         # 添加总计行
         table_data.append([
@@ -398,6 +583,7 @@ class ChartVisualizer:
         
         ax.set_title('收入来源详细分析', fontsize=14, fontweight='bold', pad=20)
 
+    @_tracks_axes
     def _plot_summary_stats(self, ax):
         """绘制统计摘要表格"""
         # 生成统计数据
@@ -459,56 +645,50 @@ class ChartVisualizer:
         ax.set_title('财务数据统计摘要', fontsize=14, fontweight='bold', pad=20)
     
     def _generate_summary_data(self):
-        """生成统计摘要数据"""
-        total_transactions = len(self.data)
-        income_data = self.data[self.data['收/支'].str.contains('收入', na=False)]
-        expense_data = self.data[self.data['收/支'].str.contains('支出', na=False)]
+        """生成统计摘要数据（结果缓存到数据变更为止）"""
+        return self._summary_cache
+    
+    @cached_property
+    def _summary_cache(self):
+        income_amounts = self._income_amounts
+        expense_amounts = self._expense_amounts
         
-        total_income = income_data['金额'].sum() if not income_data.empty else 0
-        total_expense = abs(expense_data['金额'].sum()) if not expense_data.empty else 0
+        total_income = self._total_income
+        total_expense = self._total_expense
         net_income = total_income - total_expense
         
-        avg_income = income_data['金额'].mean() if not income_data.empty else 0
-        avg_expense = abs(expense_data['金额'].mean()) if not expense_data.empty else 0
+        avg_income = np.nanmean(income_amounts) if income_amounts.size else 0
+        avg_expense = abs(np.nanmean(expense_amounts)) if expense_amounts.size else 0
         
         return {
-            'total_transactions': total_transactions,
+            'total_transactions': len(self.data),
             'total_income': total_income,
             'total_expense': total_expense,
             'net_income': net_income,
-            'income_count': len(income_data),
-            'expense_count': len(expense_data),
+            'income_count': income_amounts.size,
+            'expense_count': expense_amounts.size,
             'avg_income': avg_income,
             'avg_expense': avg_expense
         }
 
+    @_tracks_axes
     def _plot_monthly_summary_table(self, ax):
         """绘制月度统计摘要表格"""
-        # 确保日期列是datetime类型
         if '交易时间' in self.data.columns:
-            self.data['交易时间'] = pd.to_datetime(self.data['交易时间'])
-            
             # 按月分组统计
-            monthly_stats = []
-            for month, group in self.data.groupby(self.data['交易时间'].dt.to_period('M')):
-                income_data = group[group['收/支'].str.contains('收入', na=False)]
-                expense_data = group[group['收/支'].str.contains('支出', na=False)]
-                
-                total_income = income_data['金额'].sum()
-                total_expense = abs(expense_data['金额'].sum())
-                net_income = total_income - total_expense
-                
-                monthly_stats.append([
-                    str(month),
-                    f"{len(group)}笔",
-                    f"¥{total_income:.2f}",
-                    f"¥{total_expense:.2f}",
-                    f"¥{net_income:.2f}"
-                ])
+            stats = self.monthly_stats
+            monthly_stats = [
+                [str(month), f"{count}笔", f"¥{income:.2f}", f"¥{expense:.2f}", f"¥{net:.2f}"]
+                for month, count, income, expense, net in zip(
+                    stats.index, stats['交易笔数'], stats['总收入'], stats['总支出'], stats['净收入'])
+            ]
+            # 保留数值形式的净收入，用于设置单元格颜色
+            net_values = stats['净收入'].to_numpy()
             
             # 如果没有月度数据，创建总体统计
             if not monthly_stats:
                 stats = self._generate_summary_data()
+                net_values = [stats['net_income']]
                 monthly_stats = [[
                     "总计",
                     f"{stats['total_transactions']}笔",
@@ -519,6 +699,7 @@ class ChartVisualizer:
         else:
             # 如果没有时间数据，显示总体统计
             stats = self._generate_summary_data()
+            net_values = [stats['net_income']]
             monthly_stats = [[
                 "总计",
                 f"{stats['total_transactions']}笔",
@@ -555,48 +736,35 @@ class ChartVisualizer:
                     
                 # 净收入列根据盈亏设置颜色
                 if j == 4:  # 净收入列
-                    net_value = float(monthly_stats[i-1][4].replace('¥', '').replace(',', ''))
-                    color = '#C8E6C9' if net_value >= 0 else '#FFCDD2'
+                    color = '#C8E6C9' if net_values[i-1] >= 0 else '#FFCDD2'
                     table[(i, j)].set_facecolor(color)
         
         ax.set_title('月度财务统计摘要', fontsize=14, fontweight='bold', pad=20)
 
+    @_tracks_axes
     def _plot_weekly_spending_pattern(self, ax):
         """绘制一周消费习惯分析"""
-        expense_data = self.data[self.data['收/支'].str.contains('支出', na=False)]
+        if not self._has_expense:
+            return self._draw_empty(ax, '暂无支出数据', '一周消费习惯分析')
         
-        if expense_data.empty:
-            ax.text(0.5, 0.5, '暂无支出数据', ha='center', va='center', transform=ax.transAxes, fontsize=12)
-            ax.set_title('一周消费习惯分析')
-            return
-        
-        # 添加星期列
-        expense_data = expense_data.copy()
-        expense_data['星期'] = expense_data['交易时间'].dt.dayofweek
-        
-        # 按星期统计支出
-        weekly_stats = expense_data.groupby('星期').agg({
-            '金额': ['sum', 'count']
-        }).round(2)
-        
-        weekly_stats.columns = ['总金额', '交易次数']
-        weekly_stats['总金额'] = weekly_stats['总金额'].abs()
-        
-        if weekly_stats.empty:
-            ax.text(0.5, 0.5, '暂无数据', ha='center', va='center', transform=ax.transAxes, fontsize=12)
-            ax.set_title('一周消费习惯分析')
-            return
+        if self.weekly_expense_stats.empty:
+            return self._draw_empty(ax, '暂无数据', '一周消费习惯分析')
         
+        self._build_weekly_spending_pattern(ax)
+        self._update_weekly_spending_pattern(ax, self._artists[ax])
+    
+    def _full_week_expense_stats(self):
+        """按星期汇总的支出，补全没有消费的星期"""
+        return self.weekly_expense_stats.reindex(range(7), fill_value=0)
+    
+    def _build_weekly_spending_pattern(self, ax):
+        """创建一周消费习惯图的柱形、标签和均值线，数值由 _update_weekly_spending_pattern 填充"""
         # 星期标签
         weekday_labels = ['周一', '周二', '周三', '周四', '周五', '周六', '周日']
         
-        # 创建完整的星期数据
-        full_week = pd.DataFrame(index=range(7))
-        weekly_stats = full_week.join(weekly_stats, how='left').fillna(0)
-        
         # 绘制柱状图
         colors = ['#FF6B6B' if i < 5 else '#4ECDC4' for i in range(7)]  # 工作日红色，周末蓝绿色
-        bars = ax.bar(range(7), weekly_stats['总金额'], color=colors, alpha=0.8)
+        bars = ax.bar(range(7), [0] * 7, color=colors, alpha=0.8)
         
         ax.set_title('一周消费习惯分析', fontsize=14, fontweight='bold')
         ax.set_ylabel('消费金额 (元)')
@@ -604,51 +772,61 @@ class ChartVisualizer:
         ax.set_xticks(range(7))
         ax.set_xticklabels(weekday_labels)
         
-        # 添加数值标签
-        for i, (amount, count) in enumerate(zip(weekly_stats['总金额'], weekly_stats['交易次数'])):
-            if amount > 0:
-                ax.text(i, amount + weekly_stats['总金额'].max() * 0.01,
-                       f'¥{amount:.0f}\n({int(count)}笔)', ha='center', va='bottom', fontsize=9)
+        # 数值标签（无消费的星期显示为空）
+        labels = [ax.text(i, 0, '', ha='center', va='bottom', fontsize=9) for i in range(7)]
+        
+        # 工作日/周末平均线
+        weekday_line = ax.axhline(y=0, color='red', linestyle='--', alpha=0.7)
+        weekend_line = ax.axhline(y=0, color='blue', linestyle='--', alpha=0.7)
+        
+        ax.grid(True, alpha=0.3, axis='y')
+        
+        self._artists[ax].update(bars=bars, labels=labels, avg_lines=[weekday_line, weekend_line])
+    
+    def _update_weekly_spending_pattern(self, ax, artists):
+        """用当前数据更新一周消费习惯图，无法就地更新时返回False"""
+        if 'bars' not in artists or not self._has_expense or self.weekly_expense_stats.empty:
+            return False
+        
+        weekly_stats = self._full_week_expense_stats()
+        max_amount = weekly_stats['总金额'].max()
+        
+        for i, (bar, label, amount, count) in enumerate(
+                zip(artists['bars'], artists['labels'], weekly_stats['总金额'], weekly_stats['交易次数'])):
+            bar.set_height(amount)
+            label.set_y(amount + max_amount * 0.01)
+            label.set_text(f'¥{amount:.0f}\n({int(count)}笔)' if amount > 0 else '')
         
-        # 添加工作日/周末平均线
         weekday_avg = weekly_stats['总金额'][:5].mean()
         weekend_avg = weekly_stats['总金额'][5:].mean()
-        
-        ax.axhline(y=weekday_avg, color='red', linestyle='--', alpha=0.7, label=f'工作日均值: ¥{weekday_avg:.0f}')
-        ax.axhline(y=weekend_avg, color='blue', linestyle='--', alpha=0.7, label=f'周末均值: ¥{weekend_avg:.0f}')
+        weekday_line, weekend_line = artists['avg_lines']
+        weekday_line.set_ydata([weekday_avg, weekday_avg])
+        weekday_line.set_label(f'工作日均值: ¥{weekday_avg:.0f}')
+        weekend_line.set_ydata([weekend_avg, weekend_avg])
+        weekend_line.set_label(f'周末均值: ¥{weekend_avg:.0f}')
         
         ax.legend(fontsize=10)
-        ax.grid(True, alpha=0.3, axis='y')
+        ax.relim()
+        ax.autoscale_view()
+        return True
 
+    @_tracks_axes
     def _plot_hourly_spending_pattern(self, ax):
         """绘制一天消费时段分析"""
-        expense_data = self.data[self.data['收/支'].str.contains('支出', na=False)]
-        
-        if expense_data.empty:
-            ax.text(0.5, 0.5, '暂无支出数据', ha='center', va='center', transform=ax.transAxes, fontsize=12)
-            ax.set_title('一天消费时段分析')
-            return
-        
-        # 添加小时列
-        expense_data = expense_data.copy()
-        expense_data['小时'] = expense_data['交易时间'].dt.hour
-        
-        # 按小时统计支出
-        hourly_stats = expense_data.groupby('小时').agg({
-            '金额': ['sum', 'count']
-        }).round(2)
-        
-        hourly_stats.columns = ['总金额', '交易次数']
-        hourly_stats['总金额'] = hourly_stats['总金额'].abs()
+        if not self._has_expense:
+            return self._draw_empty(ax, '暂无支出数据', '一天消费时段分析')
         
-        if hourly_stats.empty:
-            ax.text(0.5, 0.5, '暂无数据', ha='center', va='center', transform=ax.transAxes, fontsize=12)
-            ax.set_title('一天消费时段分析')
-            return
+        if self.hourly_expense_stats.empty:
+            return self._draw_empty(ax, '暂无数据', '一天消费时段分析')
         
+        self._build_hourly_spending_pattern(ax)
+        self._update_hourly_spending_pattern(ax, self._artists[ax])
+    
+    def _build_hourly_spending_pattern(self, ax):
+        """创建一天消费时段图的折线和峰值标注，数值由 _update_hourly_spending_pattern 填充"""
         # 绘制折线图
-        ax.plot(hourly_stats.index, hourly_stats['总金额'], 
-               marker='o', linewidth=2, markersize=6, color='#FF6B6B', alpha=0.8)
+        line, = ax.plot([], [], 
+                        marker='o', linewidth=2, markersize=6, color='#FF6B6B', alpha=0.8)
         
         ax.set_title('一天消费时段分析', fontsize=14, fontweight='bold')
         ax.set_ylabel('消费金额 (元)')
@@ -657,57 +835,67 @@ class ChartVisualizer:
         ax.set_xticks(range(0, 24, 2))
         
         # 标注峰值时段
-        max_hour = hourly_stats['总金额'].idxmax()
-        max_amount = hourly_stats['总金额'].max()
-        ax.annotate(f'峰值: {max_hour}时\n¥{max_amount:.0f}', 
-                   xy=(max_hour, max_amount), xytext=(max_hour+2, max_amount*1.1),
-                   arrowprops=dict(arrowstyle='->', color='red', alpha=0.7),
-                   fontsize=10, ha='center', bbox=dict(boxstyle="round,pad=0.3", facecolor="yellow", alpha=0.7))
+        peak = ax.annotate('', xy=(0, 0), xytext=(0, 0),
+                           arrowprops=dict(arrowstyle='->', color='red', alpha=0.7),
+                           fontsize=10, ha='center', bbox=dict(boxstyle="round,pad=0.3", facecolor="yellow", alpha=0.7))
         
         ax.grid(True, alpha=0.3)
+        
+        self._artists[ax].update(line=line, peak=peak)
+    
+    def _update_hourly_spending_pattern(self, ax, artists):
+        """用当前数据更新一天消费时段图，无法就地更新时返回False"""
+        if 'line' not in artists or not self._has_expense or self.hourly_expense_stats.empty:
+            return False
+        
+        hourly_stats = self.hourly_expense_stats
+        artists['line'].set_data(hourly_stats.index, hourly_stats['总金额'])
+        
+        max_hour = hourly_stats['总金额'].idxmax()
+        max_amount = hourly_stats['总金额'].max()
+        peak = artists['peak']
+        peak.set_text(f'峰值: {max_hour}时\n¥{max_amount:.0f}')
+        peak.xy = (max_hour, max_amount)
+        peak.set_position((max_hour+2, max_amount*1.1))
+        
+        ax.relim()
+        ax.autoscale_view(scalex=False)
+        return True
 
+    @_tracks_axes
     def _plot_top_merchants_analysis(self, ax):
         """绘制主要消费商户分析"""
-        expense_data = self.data[self.data['收/支'].str.contains('支出', na=False)]
+        if not self._has_expense:
+            return self._draw_empty(ax, '暂无支出数据', '主要消费商户分析')
         
-        if expense_data.empty:
-            ax.text(0.5, 0.5, '暂无支出数据', ha='center', va='center', transform=ax.transAxes, fontsize=12)
-            ax.set_title('主要消费商户分析')
-            return
+        expense_data = self.expense_data
         
         # 按交易对方统计支出
-        merchant_stats = expense_data.groupby('交易对方').agg({
-            '金额': ['sum', 'count']
-        }).round(2)
+        merchant_stats = expense_data['金额'].groupby(expense_data['交易对方'], observed=True, sort=False).agg(['sum', 'count']).round(2)
         
         merchant_stats.columns = ['总金额', '交易次数']
         merchant_stats['总金额'] = merchant_stats['总金额'].abs()
-        merchant_stats = merchant_stats.sort_values('总金额', ascending=True)
         
-        # 取前10个商户
-        top_merchants = merchant_stats.tail(10)
+        # 取前10个商户（按金额升序排列，使最大的商户位于条形图顶部）
+        top_merchants = merchant_stats.nlargest(10, '总金额').iloc[::-1]
         
         if top_merchants.empty:
-            ax.text(0.5, 0.5, '暂无商户数据', ha='center', va='center', transform=ax.transAxes, fontsize=12)
-            ax.set_title('主要消费商户分析')
-            return
+            return self._draw_empty(ax, '暂无商户数据', '主要消费商户分析')
         
         # 绘制水平条形图
-        colors = plt.cm.viridis(np.linspace(0, 1, len(top_merchants)))
+        colors = matplotlib.colormaps['viridis'](np.linspace(0, 1, len(top_merchants)))
         bars = ax.barh(top_merchants.index, top_merchants['总金额'], color=colors, alpha=0.8)
         
         ax.set_title('主要消费商户分析 (TOP10)', fontsize=14, fontweight='bold')
         ax.set_xlabel('消费金额 (元)')
         
         # 添加数值标签
-        for bar, amount, count in zip(bars, top_merchants['总金额'], top_merchants['交易次数']):
-            width = bar.get_width()
-            ax.text(width + width*0.01, bar.get_y() + bar.get_height()/2,
-                   f'¥{amount:.0f} ({int(count)}次)', 
-                   ha='left', va='center', fontsize=9, fontweight='bold')
+        labels = [f'¥{amount:.0f} ({int(count)}次)'
+                  for amount, count in zip(top_merchants['总金额'], top_merchants['交易次数'])]
+        ax.bar_label(bars, labels=labels, padding=3, fontsize=9, fontweight='bold')
         
         ax.grid(True, alpha=0.3, axis='x')
-        plt.setp(ax.get_yticklabels(), fontsize=9)
+        ax.tick_params(axis='y', labelsize=9)
 
     def generate_summary_statistics(self):
         """生成收入支出统计摘要"""
@@ -721,8 +909,8 @@ class ChartVisualizer:
         
         # 基本统计
         total_transactions = len(self.data)
-        income_total = self.income_data['金额'].sum() if not self.income_data.empty else 0
-        expense_total = abs(self.expense_data['金额'].sum()) if not self.expense_data.empty else 0
+        income_total = self._total_income
+        expense_total = self._total_expense
         net_income = income_total - expense_total
         
         print(f"总交易笔数: {total_transactions}")
@@ -734,7 +922,7 @@ class ChartVisualizer:
         # 收入分类统计
         if not self.income_data.empty:
             print("收入分类 TOP5:")
-            income_categories = self.income_data.groupby('商品说明')['金额'].sum().sort_values(ascending=False).head(5)
+            income_categories = self.income_data.groupby('商品说明', observed=True, sort=False)['金额'].sum().nlargest(5)
             for category, amount in income_categories.items():
                 print(f"  {category}: ¥{amount:.2f}")
         print()
@@ -742,7 +930,7 @@ class ChartVisualizer:
         # 支出分类统计
         if not self.expense_data.empty:
             print("支出分类 TOP5:")
-            expense_categories = self.expense_data.groupby('商品说明')['金额'].sum().apply(abs).sort_values(ascending=False).head(5)
+            expense_categories = self.expense_data.groupby('商品说明', observed=True, sort=False)['金额'].sum().abs().nlargest(5)
             for category, amount in expense_categories.items():
                 print(f"  {category}: ¥{amount:.2f}")
         print()
@@ -750,7 +938,7 @@ class ChartVisualizer:
         # 支付方式统计
         if '收/付款方式' in self.data.columns:
             print("支付方式统计:")
-            payment_methods = self.data.groupby('收/付款方式')['金额'].sum().apply(abs).sort_values(ascending=False)
+            payment_methods = self.data.groupby('收/付款方式', observed=True, sort=False)['金额'].sum().abs().sort_values(ascending=False)
             for method, amount in payment_methods.items():
                 print(f"  {method}: ¥{amount:.2f}")
         
@@ -765,15 +953,11 @@ class ChartVisualizer:
         ax1 = fig.add_subplot(2, 1, 1)
         ax2 = fig.add_subplot(2, 1, 2)
         
-        # 支出分类汇总表
-        expense_data = self.data[self.data['金额'] < 0].copy()
+        # 支出分类汇总表（复用按统一分类缓存的金额与笔数，只另行汇总主要商户）
+        expense_data = self.expense_data
         if not expense_data.empty:
-            # 使用正确的列名
-            category_col = '交易分类' if '交易分类' in expense_data.columns else '交易类型'
-            expense_summary = expense_data.groupby(category_col).agg({
-                '金额': ['sum', 'count'],
-                '交易对方': lambda x: ', '.join(x.unique()[:3])  # 只显示前3个
-            }).round(2)
+            expense_summary = self._expense_by_category.round(2)
+            expense_summary['主要商户'] = self._top_counterparties(expense_data, self._expense_category)
             
             # 重命名列
             expense_summary.columns = ['总金额', '交易次数', '主要商户']
@@ -803,14 +987,10 @@ class ChartVisualizer:
                 table1[(0, i)].set_text_props(weight='bold', color='white')
         
         # 收入来源汇总表
-        income_data = self.data[self.data['金额'] > 0].copy()
+        income_data = self.income_data
         if not income_data.empty:
-            # 使用正确的列名
-            category_col = '交易分类' if '交易分类' in income_data.columns else '交易类型'
-            income_summary = income_data.groupby(category_col).agg({
-                '金额': ['sum', 'count'],
-                '交易对方': lambda x: ', '.join(x.unique()[:3])  # 只显示前3个
-            }).round(2)
+            income_summary = self._income_by_category.round(2)
+            income_summary['主要来源'] = self._top_counterparties(income_data, self._income_category)
             
             # 重命名列
             income_summary.columns = ['总金额', '交易次数', '主要来源']
@@ -839,13 +1019,56 @@ class ChartVisualizer:
                 table2[(0, i)].set_text_props(weight='bold', color='white')
         
         # 调整子图间距
-        plt.subplots_adjust(hspace=0.4)
+        fig.subplots_adjust(hspace=0.4)
+    
+    @staticmethod
+    def _top_counterparties(data, category, n=3):
+        """
+        各分类中按出现顺序的前n个不同交易对方，以逗号拼接
+        :param data: 交易数据DataFrame
+        :param category: 与 data 对齐的分类Series
+        """
+        pairs = pd.DataFrame({
+            '分类': category.to_numpy(),
+            '交易对方': data['交易对方'].astype(object).to_numpy()
+        }).dropna().drop_duplicates()
+        # 去重后按组内序号截取，每组拼接的字符串不超过n个
+        pairs = pairs[pairs.groupby('分类', sort=False).cumcount() < n]
+        return pairs.groupby('分类', sort=False)['交易对方'].agg(', '.join)
+    
+    @staticmethod
+    def _zebra_colours(n_rows, n_cols):
+        """明细表数据行的交替底色：第1、3、5…行白色，第2、4、6…行浅灰"""
+        striped = np.where(np.arange(n_rows) % 2 == 1, '#f0f0f0', 'white')
+        return np.repeat(striped[:, None], n_cols, axis=1)
+    
+    @staticmethod
+    def _detail_cell_text(sorted_data, amounts):
+        """
+        逐列格式化明细记录（说明、金额、时间、支付方式），拼接为表格单元格文本
+        :param sorted_data: 已排序的明细记录
+        :param amounts: 与 sorted_data 对齐的待显示金额
+        """
+        unknown = pd.Series('未知', index=sorted_data.index)
+        description = sorted_data.get('商品说明', unknown).astype(object).fillna('未知')
+        payment_method = sorted_data.get('收/付款方式', unknown).astype(object).fillna('未知')
+        time_str = sorted_data['交易时间'].dt.strftime('%Y-%m-%d %H:%M').fillna('未知')
+        return np.column_stack([
+            description.to_numpy(),
+            amounts.map('{:.2f}'.format).to_numpy(),
+            time_str.to_numpy(),
+            payment_method.to_numpy()
+        ])
+    
+    def _create_expense_category_detail_tables(self):
         """为每个消费品类创建详细表格页面"""
+        plt = _pyplot()
+        
         if self.expense_data.empty:
             return []
         
         # 按交易分类分组
-        category_groups = self.expense_data.groupby('交易分类')
+        category_groups = self.expense_data.groupby('交易分类', observed=True)
         detail_pages = []
         
         for category, group_data in category_groups:
@@ -857,23 +1080,15 @@ class ChartVisualizer:
             ax.axis('tight')
             ax.axis('off')
             
-            # 准备表格数据
-            table_data = []
-            table_data.append(['商品说明', '金额(元)', '交易时间', '支付方式'])
-            
-            # 按金额降序排列
-            sorted_data = group_data.sort_values('金额', key=abs, ascending=False)
-            
-            for _, row in sorted_data.iterrows():
-                amount_str = f"{abs(row['金额']):.2f}"
-                time_str = row['交易时间'].strftime('%Y-%m-%d %H:%M') if pd.notna(row['交易时间']) else '未知'
-                payment_method = row.get('收/付款方式', '未知')
-                description = row.get('商品说明', '未知')
-                
-                table_data.append([description, amount_str, time_str, payment_method])
+            # 准备表格数据（按金额降序排列）
+            col_labels = ['商品说明', '金额(元)', '交易时间', '支付方式']
+            sorted_data = group_data.sort_values('金额绝对值', ascending=False)
+            cell_text = self._detail_cell_text(sorted_data, sorted_data['金额绝对值'])
             
-            # 创建表格
-            table = ax.table(cellText=table_data[1:], colLabels=table_data[0],
+            # 创建表格（表头和数据行交替颜色在创建时一并指定）
+            table = ax.table(cellText=cell_text, colLabels=col_labels,
+                           cellColours=self._zebra_colours(*cell_text.shape),
+                           colColours=['#4CAF50'] * len(col_labels),
                            cellLoc='center', loc='center')
             
             # 设置表格样式
@@ -881,19 +1096,10 @@ class ChartVisualizer:
             table.set_fontsize(9)
             table.scale(1.2, 1.5)
             
-            # 设置表头样式
-            for i in range(len(table_data[0])):
-                table[(0, i)].set_facecolor('#4CAF50')
+            # 设置表头文字样式
+            for i in range(len(col_labels)):
                 table[(0, i)].set_text_props(weight='bold', color='white')
             
-            # 设置数据行样式（交替颜色）
-            for i in range(1, len(table_data)):
-                for j in range(len(table_data[0])):
-                    if i % 2 == 0:
-                        table[(i, j)].set_facecolor('#f0f0f0')
-                    else:
-                        table[(i, j)].set_facecolor('white')
-            
             # 设置标题
             total_amount = abs(group_data['金额'].sum())
             transaction_count = len(group_data)
@@ -907,11 +1113,13 @@ class ChartVisualizer:
     
     def _create_income_source_detail_tables(self):
         """为每个收入来源创建详细表格页面"""
+        plt = _pyplot()
+        
         if self.income_data.empty:
             return []
         
         # 按交易分类分组
-        category_groups = self.income_data.groupby('交易分类')
+        category_groups = self.income_data.groupby('交易分类', observed=True)
         detail_pages = []
         
         for category, group_data in category_groups:
@@ -923,23 +1131,15 @@ class ChartVisualizer:
             ax.axis('tight')
             ax.axis('off')
             
-            # 准备表格数据
-            table_data = []
-            table_data.append(['收入说明', '金额(元)', '交易时间', '收款方式'])
-            
-            # 按金额降序排列
+            # 准备表格数据（按金额降序排列）
+            col_labels = ['收入说明', '金额(元)', '交易时间', '收款方式']
             sorted_data = group_data.sort_values('金额', ascending=False)
+            cell_text = self._detail_cell_text(sorted_data, sorted_data['金额'])
             
-            for _, row in sorted_data.iterrows():
-                amount_str = f"{row['金额']:.2f}"
-                time_str = row['交易时间'].strftime('%Y-%m-%d %H:%M') if pd.notna(row['交易时间']) else '未知'
-                payment_method = row.get('收/付款方式', '未知')
-                description = row.get('商品说明', '未知')
-                
-                table_data.append([description, amount_str, time_str, payment_method])
-            
-            # 创建表格
-            table = ax.table(cellText=table_data[1:], colLabels=table_data[0],
+            # 创建表格（表头和数据行交替颜色在创建时一并指定）
+            table = ax.table(cellText=cell_text, colLabels=col_labels,
+                           cellColours=self._zebra_colours(*cell_text.shape),
+                           colColours=['#2196F3'] * len(col_labels),
                            cellLoc='center', loc='center')
             
             # 设置表格样式
@@ -947,19 +1147,10 @@ class ChartVisualizer:
             table.set_fontsize(9)
             table.scale(1.2, 1.5)
             
-            # 设置表头样式
-            for i in range(len(table_data[0])):
-                table[(0, i)].set_facecolor('#2196F3')
+            # 设置表头文字样式
+            for i in range(len(col_labels)):
                 table[(0, i)].set_text_props(weight='bold', color='white')
             
-            # 设置数据行样式（交替颜色）
-            for i in range(1, len(table_data)):
-                for j in range(len(table_data[0])):
-                    if i % 2 == 0:
-                        table[(i, j)].set_facecolor('#f0f0f0')
-                    else:
-                        table[(i, j)].set_facecolor('white')
-            
             # 设置标题
             total_amount = group_data['金额'].sum()
             transaction_count = len(group_data)
@@ -970,9 +1161,48 @@ class ChartVisualizer:
             detail_pages.append(fig)
         
         return detail_pages
-
+    
+    def _forget_closed_figures(self):
+        """移除已关闭图形中子图的登记，避免登记表让已关闭的图形无法释放"""
+        from matplotlib._pylab_helpers import Gcf
+        open_figures = {manager.canvas.figure for manager in Gcf.get_all_fig_managers()}
+        for ax in [ax for ax in self._artists if ax.figure not in open_figures]:
+            del self._artists[ax]
+    
+    def _close_figure(self, fig):
+        """关闭图形并移除其子图的登记（用于保存后不再更新的PDF页面）"""
+        _pyplot().close(fig)
+        for ax in fig.axes:
+            self._artists.pop(ax, None)
+    
+    def refresh(self, new_data):
+        """
+        替换数据并更新已绘制的图表：支持就地更新的子图只修改已有图形元素，
+        其余子图清空后重绘
+        :param new_data: 新的交易数据DataFrame
+        """
+        self.data = new_data
+        
+        # 跳过并移除已关闭图形中的子图
+        self._forget_closed_figures()
+        
+        figures = set()
+        for ax, artists in list(self._artists.items()):
+            update = getattr(self, f"_update_{artists['name']}", None)
+            if update is None or not update(ax, artists):
+                ax.clear()
+                getattr(self, f"_plot_{artists['name']}")(ax)
+            figures.add(ax.figure)
+        
+        for fig in figures:
+            fig.canvas.draw_idle()
+    
     def show_all_charts(self):
         """显示所有图表（带滚动功能）"""
+        plt = _pyplot()
+        # 之前关闭的仪表板窗口不再需要更新
+        self._forget_closed_figures()
+        
         # 创建更大的图形以容纳所有图表
         fig = plt.figure(figsize=(20, 20))
         
@@ -1013,7 +1243,6 @@ class ChartVisualizer:
     def export_to_pdf(self, filename=None):
         """导出图表为PDF文件，优化布局和页面数量"""
         from matplotlib.backends.backend_pdf import PdfPages
-        import matplotlib
         matplotlib.use('Agg')  # 使用非交互式后端，不显示图表
         
         # 自动生成文件名
@@ -1024,76 +1253,51 @@ class ChartVisualizer:
         
         print(f"正在导出PDF文件: {filename}")
         
-        # 统一页面大小
+        # 统一页面大小；各页按布局创建（标题、间距、子图已设置好），保存后立即关闭
         page_size = (16, 20)
-        
-        with PdfPages(filename) as pdf:
-            # 第一页：主要图表概览
-            fig = plt.figure(figsize=page_size)
-            fig.suptitle('个人财务分析报告', fontsize=18, fontweight='bold', y=0.98)
-            
-            # 调整子图间距
-            plt.subplots_adjust(hspace=0.4, wspace=0.3, top=0.95, bottom=0.05)
-            
-            # 子图1: 收入支出对比
-            ax1 = plt.subplot(3, 2, 1)
-            self._plot_income_expense_comparison(ax1)
-            
-            # 子图2: 周度趋势
-            ax2 = plt.subplot(3, 2, 2)
-            self._plot_weekly_trend_subplot(ax2)
-            
-            # 子图3: 收入支出饼图
-            ax3 = plt.subplot(3, 2, 3)
-            self._plot_income_expense_pie(ax3)
-            
-            # 子图4: 收入来源分析
-            ax4 = plt.subplot(3, 2, 4)
-            self._plot_income_source_analysis(ax4)
-            
-            # 子图5: 月度统计总览
-            ax5 = plt.subplot(3, 2, 5)
-            self._plot_monthly_summary_table(ax5)
-            
-            # 子图6: 统计摘要
-            ax6 = plt.subplot(3, 2, 6)
-            self._plot_summary_stats(ax6)
-            
-            # 保存第一页到PDF
-            pdf.savefig(fig, bbox_inches='tight')
-            plt.close(fig)
-            
-            # 第二页：分类分析和支付方式
-            fig2 = plt.figure(figsize=page_size)
-            fig2.suptitle('分类分析与支付方式', fontsize=16, fontweight='bold', y=0.95)
-            
-            # 调整子图间距
-            plt.subplots_adjust(hspace=0.4, wspace=0.3, top=0.9, bottom=0.1)
-            
-            # 支出品类分布饼图
-            ax2_1 = plt.subplot(2, 2, 1)
-            self._plot_expense_category_pie(ax2_1)
-            
-            # 收入来源分布饼图
-            ax2_2 = plt.subplot(2, 2, 2)
-            self._plot_income_source_pie(ax2_2)
-            
-            # 支付方式分析
-            ax2_3 = plt.subplot(2, 1, 2)
-            self._plot_payment_method_subplot(ax2_3)
-            
-            pdf.savefig(fig2, bbox_inches='tight')
-            plt.close(fig2)
-            
-            # 第三页：详细数据表格（合并显示）
-            fig3 = plt.figure(figsize=page_size)
-            fig3.suptitle('详细交易记录', fontsize=16, fontweight='bold', y=0.95)
-            
-            # 创建合并的详细表格
-            self._create_combined_detail_table(fig3)
-            
-            pdf.savefig(fig3, bbox_inches='tight')
-            plt.close(fig3)
+        # 页面以矢量文字和简单图形为主：简化路径以加快保存；仅在导出期间生效，不影响之后的绘图
+        with matplotlib.rc_context({
+            'path.simplify': True,
+            'path.simplify_threshold': 1.0,
+            'agg.path.chunksize': 10000,
+        }):
+            with PdfPages(filename) as pdf:
+                # 第一页：主要图表概览
+                fig = _page_figure(page_size, 'overview')
+                
+                # 子图1-6: 收入支出对比、周度趋势、收入支出饼图、收入来源分析、月度统计总览、统计摘要
+                ax1, ax2, ax3, ax4, ax5, ax6 = fig.axes
+                self._plot_income_expense_comparison(ax1)
+                self._plot_weekly_trend_subplot(ax2)
+                self._plot_income_expense_pie(ax3)
+                self._plot_income_source_analysis(ax4)
+                self._plot_monthly_summary_table(ax5)
+                self._plot_summary_stats(ax6)
+                
+                # 保存第一页到PDF
+                pdf.savefig(fig)
+                self._close_figure(fig)
+                
+                # 第二页：分类分析和支付方式
+                fig = _page_figure(page_size, 'categories')
+                
+                # 支出品类分布饼图、收入来源分布饼图、支付方式分析
+                ax2_1, ax2_2, ax2_3 = fig.axes
+                self._plot_expense_category_pie(ax2_1)
+                self._plot_income_source_pie(ax2_2)
+                self._plot_payment_method_subplot(ax2_3)
+                
+                pdf.savefig(fig)
+                self._close_figure(fig)
+                
+                # 第三页：详细数据表格（合并显示）
+                fig = _page_figure(page_size, 'details')
+                
+                # 创建合并的详细表格
+                self._create_combined_detail_table(fig)
+                
+                pdf.savefig(fig)
+                self._close_figure(fig)
         
         print(f"PDF文件已成功导出: {filename}")
         return filename
@@ -1133,48 +1337,32 @@ class ChartVisualizer:
 
 
 def create_sample_data():
-    """创建示例数据用于测试"""
-    import random
-    from datetime import datetime, timedelta
-    
+    """创建示例数据用于测试（按列一次性随机生成，固定随机种子以便复现）"""
     # 示例交易分类
     income_categories = ['工资', '奖金', '投资收益', '兼职收入', '其他收入']
     expense_categories = ['餐饮', '交通', '购物', '娱乐', '房租', '水电费', '医疗', '教育']
     payment_methods = ['支付宝', '微信支付', '银行卡', '现金', '信用卡']
     
-    data = []
-    start_date = datetime(2024, 1, 1)
+    rng = np.random.default_rng(0)
+    n = 200  # 生成200条示例数据
     
-    for i in range(200):  # 生成200条示例数据
-        # 随机生成日期
-        random_days = random.randint(0, 365)
-        transaction_date = start_date + timedelta(days=random_days)
-        
-        # 随机决定是收入还是支出
-        is_income = random.choice([True, False])
-        
-        if is_income:
-            category = random.choice(income_categories)
-            amount = random.randint(3000, 15000)
-            income_expense = '收入'
-        else:
-            category = random.choice(expense_categories)
-            amount = -random.randint(50, 2000)
-            income_expense = '支出'
-        
-        payment_method = random.choice(payment_methods)
-        description = f"{category}相关交易"
-        
-        data.append({
-            '交易时间': transaction_date,
-            '交易分类': category,
-            '商品说明': description,
-            '收/支': income_expense,
-            '金额': amount,
-            '收/付款方式': payment_method
-        })
+    # 随机生成日期
+    days = rng.integers(0, 366, n)
+    transaction_dates = np.datetime64('2024-01-01', 'ns') + days.astype('timedelta64[D]')
+    
+    # 随机决定是收入还是支出
+    is_income = rng.integers(0, 2, n).astype(bool)
+    categories = np.where(is_income, rng.choice(income_categories, n), rng.choice(expense_categories, n))
+    amounts = np.where(is_income, rng.integers(3000, 15001, n), -rng.integers(50, 2001, n))
     
-    return pd.DataFrame(data)
+    return pd.DataFrame({
+        '交易时间': transaction_dates,
+        '交易分类': categories,
+        '商品说明': np.char.add(categories, '相关交易'),
+        '收/支': np.where(is_income, '收入', '支出'),
+        '金额': amounts,
+        '收/付款方式': rng.choice(payment_methods, n)
+    })
 
 
 if __name__ == "__main__":
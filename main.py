@@ -1,27 +1,169 @@
 import pandas as pd
+import numpy as np
 import os
+import re
 import glob
+from concurrent.futures import ProcessPoolExecutor
 from chart_visualizer import ChartVisualizer
 
+# 可选依赖：安装了polars时用其多线程处理账单清洗与合并，否则使用pandas
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+# 可选依赖：安装了pyarrow时其余文本列改用Arrow字符串存储
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+# 金额中的非数字字符（货币符号、千分位逗号等）
+_AMOUNT_RE = re.compile(r'[^\d.\-]')
+
+# 微信支付账单的列名映射
+WECHAT_COLUMNS = {
+    '交易时间': '交易时间',
+    '交易类型': '交易分类', 
+    '交易对方': '交易对方',
+    '商品': '商品说明',
+    '收/支': '收/支',
+    '金额(元)': '金额',
+    '支付方式': '收/付款方式'
+}
+
+def clean_amount(amounts):
+    """将金额列转换为数值；已是数值类型时直接返回，否则移除非数字字符后转换"""
+    values = amounts.to_numpy()
+    if values.dtype.kind in 'fiu':
+        return amounts
+    cleaned = np.fromiter((_AMOUNT_RE.sub('', v) if isinstance(v, str) else v for v in values),
+                          dtype=object, count=len(values))
+    return pd.to_numeric(cleaned, errors='coerce')
+
+# 微信、支付宝账单的交易时间格式
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+def parse_transaction_time(times):
+    """按账单固定格式解析交易时间；不符合该格式的非空值再逐个推断格式解析，无法解析的记为NaT"""
+    parsed = pd.to_datetime(times, format=TIME_FORMAT, errors='coerce')
+    failed = parsed.isna() & times.notna()
+    if failed.any():
+        parsed[failed] = pd.to_datetime(times[failed], format='mixed', errors='coerce')
+    return parsed
+
+# 读入后转为分类类型的文本列：取值种类很少的列，以及 ChartVisualizer 按分类类型分组的交易对方、商品说明
+CATEGORY_COLUMNS = ('数据源', '交易分类', '收/支', '收/付款方式', '交易对方', '商品说明')
+
+def to_categorical(df):
+    """将分组用的文本列转为分类类型，减少内存并让分组按整数编码进行"""
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns:
+            # 已是分类类型的列（如过滤前转换的收/支）去掉已被过滤掉的类别
+            df[column] = df[column].astype('category').cat.remove_unused_categories()
+    return df
+
+def to_arrow_strings(df):
+    """将分类列以外剩余的object文本列转为Arrow字符串类型（连续存储，内存约为Python字符串的1/4）；未安装pyarrow时原样返回"""
+    if pyarrow is None:
+        return df
+    for column in df.select_dtypes('object').columns:
+        df[column] = df[column].astype('string[pyarrow]')
+    return df
+
+def category_mask(values, predicate):
+    """
+    只在去重后的类别上做字符串判断，再按分类编码映射回每一行
+    :param values: 分类类型的Series
+    :param predicate: 接收类别字符串Index、返回布尔数组的函数
+    """
+    categories = values.cat.categories
+    return values.isin(categories[predicate(categories.astype(str))])
+
+def read_csv_fast(file_path, **kwargs):
+    """
+    优先使用 pyarrow 多线程解析CSV并返回Arrow类型列，未安装pyarrow或解析失败时退回默认引擎。
+    指定dtype时也使用默认引擎：pyarrow引擎先推断类型再转为文本，缺失值会变成'<NA>'字符串
+    """
+    if kwargs.get('dtype') is None:
+        try:
+            df = pd.read_csv(file_path, engine='pyarrow', dtype_backend='pyarrow', **kwargs)
+        except (ImportError, ValueError):
+            pass
+        else:
+            # 空白表头按默认引擎的方式命名为 Unnamed: N，使两种引擎得到相同的列名
+            df.columns = [name if name != '' else f'Unnamed: {i}' for i, name in enumerate(df.columns)]
+            return df
+    return pd.read_csv(file_path, **kwargs)
+
+def read_excel_fast(file_path, **kwargs):
+    """优先使用 calamine 读取xlsx，未安装python-calamine时退回openpyxl"""
+    try:
+        return pd.read_excel(file_path, engine='calamine', **kwargs)
+    except ImportError:
+        return pd.read_excel(file_path, **kwargs)
+
+def locate_header_row(df_peek, keywords):
+    """在已读入的行中查找第一个同时包含所有关键字的行，未找到时返回None"""
+    if df_peek.empty:
+        return None
+    # 每行拼接为一个字符串，逐关键字整列匹配后取第一个全部命中的行
+    joined = df_peek.astype(str).agg(''.join, axis=1)
+    mask = np.logical_and.reduce([joined.str.contains(keyword, regex=False).to_numpy() for keyword in keywords])
+    idx = np.flatnonzero(mask)
+    if idx.size:
+        return int(idx[0])
+    return None
+
 def find_header_row(file_path, keywords, max_rows_to_check=30):
     try:
         if file_path.endswith('.csv'):
+            # pyarrow引擎不支持nrows，只读前几行时仍使用默认引擎
             df_peek = pd.read_csv(file_path, header=None, nrows=max_rows_to_check, encoding='utf-8')
         elif file_path.endswith('.xlsx'):
-            df_peek = pd.read_excel(file_path, header=None, nrows=max_rows_to_check)
+            df_peek = read_excel_fast(file_path, header=None, nrows=max_rows_to_check)
         else:
             print("不支持的文件格式。请提供.csv或.xlsx文件。")
             return None
 
-        for i, row in df_peek.iterrows():
-            row_str = ''.join(str(s) for s in row.values)
-            if all(keyword in row_str for keyword in keywords):
-                return i
+        return locate_header_row(df_peek, keywords)
     except Exception as e:
         print(f"读取文件时出错: {e}")
         return None
-    
-    return None
+
+def read_alipay_table(file_path, header_keywords, dtype=None, max_rows_to_check=30):
+    """
+    定位表头行并读取支付宝账单明细；xlsx整表只解析一次，表头在内存中查找
+    :param dtype: 传给读取函数的列类型，None 时自动推断
+    """
+    if file_path.endswith('.xlsx'):
+        try:
+            raw = read_excel_fast(file_path, header=None, dtype=dtype)
+        except Exception as e:
+            print(f"读取文件时出错: {e}")
+            return None
+        header_row_index = locate_header_row(raw.head(max_rows_to_check), header_keywords)
+    else:
+        header_row_index = find_header_row(file_path, header_keywords, max_rows_to_check)
+
+    if header_row_index is None:
+        print(f"错误：在文件 '{file_path}' 的前{max_rows_to_check}行中未找到包含所有关键字的表头。")
+        return None
+
+    print(f"成功找到表头，位于第 {header_row_index + 1} 行。")
+
+    try:
+        if file_path.endswith('.csv'):
+            return read_csv_fast(file_path, header=header_row_index, encoding='utf-8', dtype=dtype)
+        
+        # 以表头行作为列名，其后的行作为数据；无表头时按原样推断列类型
+        df = raw.iloc[header_row_index + 1:].reset_index(drop=True)
+        df.columns = [name if pd.notna(name) else f'Unnamed: {i}'
+                      for i, name in enumerate(raw.iloc[header_row_index])]
+        return df if dtype is not None else df.infer_objects()
+    except Exception as e:
+        print(f"从第 {header_row_index + 1} 行读取数据时出错: {e}")
+        return None
 
 def process_wechat_file(file_path):
     """处理微信支付账单文件"""
@@ -29,21 +171,10 @@ def process_wechat_file(file_path):
     
     try:
         # 微信支付账单从第17行开始（跳过前16行的头部信息）
-        df = pd.read_excel(file_path, skiprows=16)
-        
-        # 微信支付账单的列名映射
-        wechat_columns = {
-            '交易时间': '交易时间',
-            '交易类型': '交易分类', 
-            '交易对方': '交易对方',
-            '商品': '商品说明',
-            '收/支': '收/支',
-            '金额(元)': '金额',
-            '支付方式': '收/付款方式'
-        }
+        df = read_excel_fast(file_path, skiprows=16)
         
         # 重命名列以匹配统一格式
-        df = df.rename(columns=wechat_columns)
+        df = df.rename(columns=WECHAT_COLUMNS)
         
         # 添加数据源标识
         df['数据源'] = '微信支付'
@@ -51,7 +182,8 @@ def process_wechat_file(file_path):
         # 过滤中性交易（收/支列为"/"的记录）
         if '收/支' in df.columns:
             # 查找中性交易（"/"符号）
-            mask = df['收/支'].astype(str).str.strip() == '/'
+            df['收/支'] = df['收/支'].astype('category')
+            mask = category_mask(df['收/支'], lambda categories: categories.str.strip() == '/')
             rows_to_delete = df[mask]
             
             if not rows_to_delete.empty:
@@ -64,15 +196,14 @@ def process_wechat_file(file_path):
         
         # 数据清理
         if '交易时间' in df.columns:
-            df['交易时间'] = pd.to_datetime(df['交易时间'], errors='coerce')
+            df['交易时间'] = parse_transaction_time(df['交易时间'])
         
         if '金额' in df.columns:
             # 清理金额列，移除非数字字符
-            df['金额'] = df['金额'].astype(str).str.replace(r'[^\d.-]', '', regex=True)
-            df['金额'] = pd.to_numeric(df['金额'], errors='coerce')
+            df['金额'] = clean_amount(df['金额'])
         
         # 移除空行
-        df = df.dropna(subset=['交易时间', '金额'], how='any')
+        df = to_categorical(df.dropna(subset=['交易时间', '金额'], how='any'))
         
         print(f"微信支付数据处理完成，共有 {len(df)} 行有效数据。")
         return df
@@ -86,21 +217,8 @@ def process_alipay_file(file_path):
     print(f"正在处理支付宝账单文件: {file_path}")
     
     header_keywords = ['交易时间', '交易分类', '商品说明']
-    header_row_index = find_header_row(file_path, header_keywords)
-
-    if header_row_index is None:
-        print(f"错误：在文件 '{file_path}' 的前30行中未找到包含所有关键字的表头。")
-        return None
-
-    print(f"成功找到表头，位于第 {header_row_index + 1} 行。")
-
-    try:
-        if file_path.endswith('.csv'):
-            df = pd.read_csv(file_path, header=header_row_index, encoding='utf-8')
-        else: 
-            df = pd.read_excel(file_path, header=header_row_index)
-    except Exception as e:
-        print(f"从第 {header_row_index + 1} 行读取数据时出错: {e}")
+    df = read_alipay_table(file_path, header_keywords)
+    if df is None:
         return None
         
     # 添加数据源标识
@@ -109,7 +227,8 @@ def process_alipay_file(file_path):
     # 在收/支列搜索所有不计收支的列，然后删除这些行的数据
     if '收/支' in df.columns:
         # 查找包含"不计收支"的行
-        mask = df['收/支'].astype(str).str.contains('不计收支', na=False)
+        df['收/支'] = df['收/支'].astype('category')
+        mask = category_mask(df['收/支'], lambda categories: categories.str.contains('不计收支', regex=False))
         rows_to_delete = df[mask]
         
         if not rows_to_delete.empty:
@@ -122,15 +241,14 @@ def process_alipay_file(file_path):
 
     # 数据清理和类型转换
     if '交易时间' in df.columns:
-        df['交易时间'] = pd.to_datetime(df['交易时间'], errors='coerce')
+        df['交易时间'] = parse_transaction_time(df['交易时间'])
     
     if '金额' in df.columns:
         # 清理金额列，移除非数字字符
-        df['金额'] = df['金额'].astype(str).str.replace(r'[^\d.-]', '', regex=True)
-        df['金额'] = pd.to_numeric(df['金额'], errors='coerce')
+        df['金额'] = clean_amount(df['金额'])
     
     # 移除空行
-    df = df.dropna(subset=['交易时间', '金额'], how='any')
+    df = to_categorical(df.dropna(subset=['交易时间', '金额'], how='any'))
     
     print(f"支付宝数据处理完成，共有 {len(df)} 行有效数据。")
     return df
@@ -142,42 +260,150 @@ def process_transaction_file(file_path):
     else:
         return process_alipay_file(file_path)
 
+def _clean_bill_frame_polars(df):
+    """polars通用清理：金额去除非数字字符转为浮点，交易时间解析为日期时间，移除时间或金额缺失的行"""
+    exprs = []
+    if '金额' in df.columns and not df.schema['金额'].is_numeric():
+        exprs.append(pl.col('金额').cast(pl.Utf8).str.replace_all(_AMOUNT_RE.pattern, '')
+                     .cast(pl.Float64, strict=False))
+    if '交易时间' in df.columns and df.schema['交易时间'] == pl.Utf8:
+        exprs.append(pl.col('交易时间').str.strip_chars().str.strptime(pl.Datetime, strict=False))
+    return df.with_columns(exprs).drop_nulls(['交易时间', '金额'])
+
+def _process_wechat_file_polars(file_path):
+    """用polars处理微信支付账单文件（xlsx仍由pandas读取为文本列）"""
+    print(f"正在处理微信支付账单文件: {file_path}")
+    
+    df = pl.from_pandas(read_excel_fast(file_path, skiprows=16, dtype=str))
+    df = df.rename({old: new for old, new in WECHAT_COLUMNS.items() if old in df.columns and old != new})
+    df = df.with_columns(pl.lit('微信支付').alias('数据源'))
+    
+    # 过滤中性交易（收/支列为"/"的记录）
+    if '收/支' in df.columns:
+        mask = (pl.col('收/支').str.strip_chars() == '/').fill_null(False)
+        neutral_count = df.select(mask.sum()).item()
+        if neutral_count:
+            print(f"找到 {neutral_count} 行中性交易数据，将被删除。")
+            df = df.filter(~mask)
+            print(f"删除后剩余 {len(df)} 行数据。")
+        else:
+            print("未找到中性交易数据行。")
+    
+    df = _clean_bill_frame_polars(df)
+    print(f"微信支付数据处理完成，共有 {len(df)} 行有效数据。")
+    return df
+
+def _process_alipay_file_polars(file_path):
+    """用polars处理支付宝账单文件（文件仍由pandas读取为文本列）"""
+    print(f"正在处理支付宝账单文件: {file_path}")
+    
+    header_keywords = ['交易时间', '交易分类', '商品说明']
+    # 指定dtype时CSV由默认引擎读取，缺失单元格保持为空值，转换后即为polars的null
+    df = read_alipay_table(file_path, header_keywords, dtype=str)
+    if df is None:
+        return None
+    df = pl.from_pandas(df).with_columns(pl.lit('支付宝').alias('数据源'))
+    
+    # 删除收/支为"不计收支"的行
+    if '收/支' in df.columns:
+        mask = pl.col('收/支').str.contains('不计收支', literal=True).fill_null(False)
+        excluded_count = df.select(mask.sum()).item()
+        if excluded_count:
+            print(f"找到 {excluded_count} 行包含'不计收支'的数据，将被删除。")
+            df = df.filter(~mask)
+            print(f"删除后剩余 {len(df)} 行数据。")
+        else:
+            print("未找到包含'不计收支'的数据行。")
+    
+    df = _clean_bill_frame_polars(df)
+    print(f"支付宝数据处理完成，共有 {len(df)} 行有效数据。")
+    return df
+
+def _combine_bill_files_polars(wechat_files, alipay_files):
+    """用polars清洗、合并并排序所有账单，最后转换为pandas DataFrame"""
+    frames = []
+    for file_path in wechat_files:
+        df = _process_wechat_file_polars(file_path)
+        if df is not None and len(df):
+            frames.append(df)
+    for file_path in alipay_files:
+        df = _process_alipay_file_polars(file_path)
+        if df is not None and len(df):
+            frames.append(df)
+    
+    if not frames:
+        return None
+    
+    # 两种账单的列不完全相同，按列名对齐合并
+    combined = pl.concat(frames, how='diagonal_relaxed')
+    if '交易时间' in combined.columns:
+        combined = combined.sort('交易时间', descending=True, maintain_order=True)
+    return combined.to_pandas()
+
+# 账单文件总大小超过该值时才使用进程池：启动子进程并重新导入pandas/matplotlib的开销
+# 约为0.1~0.6秒（spawn方式更慢），普通的月度账单顺序解析只需几十毫秒
+PARALLEL_MIN_BYTES = 16 * 1024 * 1024
+
+def _combine_bill_files_pandas(wechat_files, alipay_files):
+    """用pandas处理账单文件并合并排序；多个大文件时在进程池中并行解析"""
+    files = wechat_files + alipay_files
+    if len(files) > 1 and sum(os.path.getsize(f) for f in files) >= PARALLEL_MIN_BYTES:
+        # 解析xlsx/csv时持有GIL，使用多进程而非多线程；map 保持文件顺序
+        with ProcessPoolExecutor(max_workers=min(len(files), os.cpu_count() or 1)) as executor:
+            results = list(executor.map(process_transaction_file, files))
+    else:
+        results = [process_transaction_file(file_path) for file_path in files]
+    
+    all_dataframes = [df for df in results if df is not None and not df.empty]
+    if not all_dataframes:
+        return None
+    
+    # 合并所有数据
+    combined_df = pd.concat(all_dataframes, ignore_index=True)
+    
+    # 按时间排序：各账单本身基本按时间有序，稳定的归并排序（Timsort）对已有序的片段接近线性
+    if '交易时间' in combined_df.columns:
+        combined_df = combined_df.sort_values('交易时间', ascending=False, kind='mergesort')
+    return combined_df
+
 def find_and_process_all_files():
     """查找并处理所有支付账单文件"""
     current_dir = os.getcwd()
-    all_dataframes = []
     
     # 查找微信支付账单文件
     wechat_files = glob.glob(os.path.join(current_dir, "*微信支付账单*.xlsx"))
-    for file_path in wechat_files:
-        print(f"找到微信支付账单文件: {file_path}")
-        df = process_wechat_file(file_path)
-        if df is not None and not df.empty:
-            all_dataframes.append(df)
     
     # 查找支付宝账单文件
     alipay_files = glob.glob(os.path.join(current_dir, "*支付宝*.csv"))
     alipay_files.extend(glob.glob(os.path.join(current_dir, "*支付宝*.xlsx")))
+    
+    for file_path in wechat_files:
+        print(f"找到微信支付账单文件: {file_path}")
     for file_path in alipay_files:
         print(f"找到支付宝账单文件: {file_path}")
-        df = process_alipay_file(file_path)
-        if df is not None and not df.empty:
-            all_dataframes.append(df)
     
-    if not all_dataframes:
+    combined_df = None
+    parsed = False
+    if pl is not None:
+        try:
+            combined_df = _combine_bill_files_polars(wechat_files, alipay_files)
+            parsed = True
+        except Exception as e:
+            print(f"使用polars处理账单时出错，改用pandas重新解析所有文件: {e}")
+    if not parsed:
+        combined_df = _combine_bill_files_pandas(wechat_files, alipay_files)
+    
+    if combined_df is None:
         print("未找到任何支付账单文件")
         return None
     
-    # 合并所有数据
-    combined_df = pd.concat(all_dataframes, ignore_index=True)
-    
-    # 按时间排序
-    if '交易时间' in combined_df.columns:
-        combined_df = combined_df.sort_values('交易时间', ascending=False)
+    # 各文件的类别集合不同，合并后分类列会退化为object，需重新转换；其余文本列转为Arrow字符串
+    combined_df = to_arrow_strings(to_categorical(combined_df))
     
     print(f"数据合并完成，总共 {len(combined_df)} 行数据")
-    print(f"其中微信支付: {len(combined_df[combined_df['数据源'] == '微信支付'])} 行")
-    print(f"其中支付宝: {len(combined_df[combined_df['数据源'] == '支付宝'])} 行")
+    source_counts = combined_df['数据源'].value_counts()
+    print(f"其中微信支付: {source_counts.get('微信支付', 0)} 行")
+    print(f"其中支付宝: {source_counts.get('支付宝', 0)} 行")
     
     return combined_df
 